@@ -202,42 +202,48 @@ class DiskAudit(ClusterAudit):
         ClusterAudit.__init__(self, cm)
         self.name = "DiskspaceAudit"
 
-    def __call__(self):
-        """Perform the audit action."""
-        result = True
-
-        # @TODO Use directory of PCMK_logfile if set on host
-        dfcmd = "df -BM %s | tail -1 | awk '{print $(NF-1)\" \"$(NF-2)}' | tr -d 'M%%'" % BuildOptions.LOG_DIR
+    def _audit_node(self, node, dfcmd):
+        """Check the free log disk space on a single node."""
+        (_, dfout) = self._cm.rsh(node, dfcmd, verbose=1)
+        if not dfout:
+            self._cm.log("ERROR: Cannot execute remote df command [%s] on %s" % (dfcmd, node))
+            return True
+
+        dfout = dfout[0].strip()
+
+        try:
+            (used, remain) = dfout.split()
+            used_percent = int(used)
+            remaining_mb = int(remain)
+        except (ValueError, TypeError):
+            self._cm.log("Warning: df output '%s' from %s was invalid [%s, %s]"
+                         % (dfout, node, used, remain))
+            return True
+
+        if remaining_mb < 10 or used_percent > 95:
+            self._cm.log("CRIT: Out of log disk space on %s (%d%% / %dMB)"
+                         % (node, used_percent, remaining_mb))
+
+            if not should_continue(self._cm.env):
+                raise ValueError("Disk full on %s" % node)
 
-        self._cm.ns.wait_for_all_nodes(self._cm.env["nodes"])
-        for node in self._cm.env["nodes"]:
-            (_, dfout) = self._cm.rsh(node, dfcmd, verbose=1)
-            if not dfout:
-                self._cm.log("ERROR: Cannot execute remote df command [%s] on %s" % (dfcmd, node))
-                continue
+            return False
 
-            dfout = dfout[0].strip()
+        if remaining_mb < 100 or used_percent > 90:
+            self._cm.log("WARN: Low on log disk space (%dMB) on %s" % (remaining_mb, node))
 
-            try:
-                (used, remain) = dfout.split()
-                used_percent = int(used)
-                remaining_mb = int(remain)
-            except (ValueError, TypeError):
-                self._cm.log("Warning: df output '%s' from %s was invalid [%s, %s]"
-                             % (dfout, node, used, remain))
-            else:
-                if remaining_mb < 10 or used_percent > 95:
-                    self._cm.log("CRIT: Out of log disk space on %s (%d%% / %dMB)"
-                                 % (node, used_percent, remaining_mb))
-                    result = False
+        return True
 
-                    if not should_continue(self._cm.env):
-                        raise ValueError("Disk full on %s" % node)
+    def __call__(self):
+        """Perform the audit action."""
+        # @TODO Use directory of PCMK_logfile if set on host
+        dfcmd = "df -BM %s | tail -1 | awk '{print $(NF-1)\" \"$(NF-2)}' | tr -d 'M%%'" % BuildOptions.LOG_DIR
 
-                elif remaining_mb < 100 or used_percent > 90:
-                    self._cm.log("WARN: Low on log disk space (%dMB) on %s" % (remaining_mb, node))
+        nodes = self._cm.env["nodes"]
+        self._cm.ns.wait_for_all_nodes(nodes)
 
-        return result
+        # Check all the nodes at the same time
+        return all(self._cm.fanout(nodes, lambda node: self._audit_node(node, dfcmd)))
 
     def is_applicable(self):
         """Return True if this audit is applicable in the current test configuration."""
@@ -264,50 +270,60 @@ class FileAudit(ClusterAudit):
         self.known = []
         self.name = "FileAudit"
 
-    def __call__(self):
-        """Perform the audit action."""
-        result = True
+    def _audit_node(self, node):
+        """
+        Look for core files and stale IPC files on a single node.
 
-        self._cm.ns.wait_for_all_nodes(self._cm.env["nodes"])
-        for node in self._cm.env["nodes"]:
+        Returns a tuple of the Pacemaker core file listing, the Corosync core
+        file listing, and whether the node was free of stale IPC files.
+        """
+        (_, pcmk_cores) = self._cm.rsh(node, "ls -al /var/lib/pacemaker/cores/* | grep core.[0-9]", verbose=1)
+        (_, corosync_cores) = self._cm.rsh(node, "ls -al /var/lib/corosync | grep core.[0-9]", verbose=1)
+        ipc_ok = True
+
+        if self._cm.expected_status.get(node) == "down":
+            clean = False
+            (_, lsout) = self._cm.rsh(node, "ls -al /dev/shm | grep qb-", verbose=1)
 
-            (_, lsout) = self._cm.rsh(node, "ls -al /var/lib/pacemaker/cores/* | grep core.[0-9]", verbose=1)
             for line in lsout:
-                line = line.strip()
+                ipc_ok = False
+                clean = True
+                self._cm.log("Warning: Stale IPC file on %s: %s" % (node, line))
 
-                if line not in self.known:
-                    result = False
-                    self.known.append(line)
-                    self._cm.log("Warning: Pacemaker core file on %s: %s" % (node, line))
+            if clean:
+                (_, lsout) = self._cm.rsh(node, "ps axf | grep -e pacemaker -e corosync", verbose=1)
 
-            (_, lsout) = self._cm.rsh(node, "ls -al /var/lib/corosync | grep core.[0-9]", verbose=1)
-            for line in lsout:
-                line = line.strip()
+                for line in lsout:
+                    self._cm.debug("ps[%s]: %s" % (node, line))
 
-                if line not in self.known:
-                    result = False
-                    self.known.append(line)
-                    self._cm.log("Warning: Corosync core file on %s: %s" % (node, line))
+                self._cm.rsh(node, "rm -rf /dev/shm/qb-*")
+
+        else:
+            self._cm.debug("Skipping %s" % node)
 
-            if self._cm.expected_status.get(node) == "down":
-                clean = False
-                (_, lsout) = self._cm.rsh(node, "ls -al /dev/shm | grep qb-", verbose=1)
+        return (pcmk_cores, corosync_cores, ipc_ok)
 
-                for line in lsout:
-                    result = False
-                    clean = True
-                    self._cm.log("Warning: Stale IPC file on %s: %s" % (node, line))
+    def __call__(self):
+        """Perform the audit action."""
+        result = True
 
-                if clean:
-                    (_, lsout) = self._cm.rsh(node, "ps axf | grep -e pacemaker -e corosync", verbose=1)
+        nodes = self._cm.env["nodes"]
+        self._cm.ns.wait_for_all_nodes(nodes)
 
-                    for line in lsout:
-                        self._cm.debug("ps[%s]: %s" % (node, line))
+        # Run the remote commands on all the nodes at the same time, but check
+        # the core files against self.known one node at a time
+        for (node, (pcmk_cores, corosync_cores, ipc_ok)) in zip(nodes, self._cm.fanout(nodes, self._audit_node)):
+            for (kind, lsout) in [("Pacemaker", pcmk_cores), ("Corosync", corosync_cores)]:
+                for line in lsout:
+                    line = line.strip()
 
-                    self._cm.rsh(node, "rm -rf /dev/shm/qb-*")
+                    if line not in self.known:
+                        result = False
+                        self.known.append(line)
+                        self._cm.log("Warning: %s core file on %s: %s" % (kind, node, line))
 
-            else:
-                self._cm.debug("Skipping %s" % node)
+            if not ipc_ok:
+                result = False
 
         return result
 
@@ -9,9 +9,11 @@ __license__ = "GNU General Public License version 2 or later (GPLv2+) WITHOUT AN
 
 import os
 import re
+import threading
 import time
 
 from collections import UserDict
+from concurrent.futures import ThreadPoolExecutor
 
 from pacemaker.buildoptions import BuildOptions
 from pacemaker._cts.CTS import NodeStatus
@@ -64,9 +66,11 @@ class ClusterManager(UserDict):
         # Eventually, ClusterManager should not be a UserDict subclass.  Until
         # that point...
         # pylint: disable=super-init-not-called
+        self.__instance_errors_epoch = 0
         self.__instance_errors_to_ignore = []
 
         self._cib_installed = False
+        self._cib_lock = threading.Lock()
         self._data = {}
         self._logger = LogFactory()
 
@@ -116,18 +120,61 @@ class ClusterManager(UserDict):
 
     def clear_instance_errors_to_ignore(self):
         """Reset instance-specific errors to ignore on each iteration."""
+        if not self.__instance_errors_to_ignore:
+            return
+
         self.__instance_errors_to_ignore = []
+        self.__instance_errors_epoch += 1
 
     @property
     def instance_errors_to_ignore(self):
         """Return a list of known errors that should be ignored for a specific test instance."""
         return self.__instance_errors_to_ignore
 
+    @property
+    def instance_errors_to_ignore_epoch(self):
+        """
+        Return a counter that changes whenever instance_errors_to_ignore does.
+
+        Callers can compare this against a previously saved value to tell
+        whether anything derived from the list needs to be rebuilt.
+        """
+        return self.__instance_errors_epoch
+
     @property
     def errors_to_ignore(self):
         """Return a list of known error messages that should be ignored."""
         return self.templates.get_patterns("BadNewsIgnore")
 
+    def fanout(self, nodes, func):
+        """
+        Call func(node) for every node in nodes at the same time.
+
+        Returns a list of the results, in the same order as nodes.  If any
+        call raised an exception, the first one is re-raised once all calls
+        have finished.
+        """
+        results = []
+        errors = []
+
+        if not nodes:
+            return results
+
+        with ThreadPoolExecutor(max_workers=len(nodes)) as pool:
+            futures = [pool.submit(func, node) for node in nodes]
+
+            for future in futures:
+                try:
+                    results.append(future.result())
+                except Exception as e:  # pylint: disable=broad-except
+                    errors.append(e)
+                    results.append(None)
+
+        if errors:
+            raise errors[0]
+
+        return results
+
     def log(self, args):
         """Log a message."""
         self._logger.log(args)
@@ -222,12 +269,14 @@ class ClusterManager(UserDict):
                     peer = n
                     peer_state[peer] = "complete"
                     self.__instance_errors_to_ignore.append(self.templates["Pat:Fencing_ok"] % peer)
+                    self.__instance_errors_epoch += 1
 
                 elif peer_state[n] != "complete" and re.search(self.templates["Pat:Fencing_start"] % n, shot):
                     # TODO: Correctly detect multiple fencing operations for the same host
                     peer = n
                     peer_state[peer] = "in-progress"
                     self.__instance_errors_to_ignore.append(self.templates["Pat:Fencing_start"] % peer)
+                    self.__instance_errors_epoch += 1
 
             if not peer:
                 self._logger.log("ERROR: Unknown stonith match: %r" % shot)
@@ -342,8 +391,13 @@ class ClusterManager(UserDict):
         self.rsh(node, self.templates["StartCmd"], synchronous=False)
         self.expected_status[node] = "up"
 
-    def stop_cm(self, node, verbose=False, force=False):
-        """Stop the cluster manager on a given node."""
+    def stop_cm(self, node, verbose=False, force=False, wait_stable=True):
+        """
+        Stop the cluster manager on a given node.
+
+        If wait_stable is False, don't wait for the rest of the cluster to
+        stabilize afterwards.
+        """
         if verbose:
             self._logger.log("Stopping %s on node %s" % (self["Name"], node))
         else:
@@ -356,7 +410,10 @@ class ClusterManager(UserDict):
         if rc == 0:
             # Make sure we can continue even if corosync leaks
             self.expected_status[node] = "down"
-            self.cluster_stable(self.env["DeadTime"])
+
+            if wait_stable:
+                self.cluster_stable(self.env["DeadTime"])
+
             return True
 
         self._logger.log("ERROR: Could not stop %s on node %s" % (self["Name"], node))
@@ -369,8 +426,15 @@ class ClusterManager(UserDict):
         self.rsh(node, self.templates["StopCmd"], synchronous=False)
         self.expected_status[node] = "down"
 
-    def startall(self, nodelist=None, verbose=False, quick=False):
-        """Start the cluster manager on every node in the cluster, or on every node in nodelist."""
+    def startall(self, nodelist=None, verbose=False, quick=False, parallel=False):
+        """
+        Start the cluster manager on every node in the cluster, or on every node in nodelist.
+
+        If parallel is True, send the asynchronous start to all nodes at the
+        same time instead of one node after another.  Waiting for the nodes
+        to come up beforehand is always done serially, since it may need to
+        prompt the user.
+        """
         if not nodelist:
             nodelist = self.env["nodes"]
 
@@ -403,8 +467,11 @@ class ClusterManager(UserDict):
         if not self.start_cm(nodelist[0], verbose=verbose):
             return False
 
-        for node in nodelist:
-            self.start_cm_async(node, verbose=verbose)
+        if parallel:
+            self.fanout(nodelist, lambda node: self.start_cm_async(node, verbose=verbose))
+        else:
+            for node in nodelist:
+                self.start_cm_async(node, verbose=verbose)
 
         watch.look_for_all()
         if watch.unmatched:
@@ -417,17 +484,35 @@ class ClusterManager(UserDict):
 
         return True
 
-    def stopall(self, nodelist=None, verbose=False, force=False):
-        """Stop the cluster manager on every node in the cluster, or on every node in nodelist."""
+    def stopall(self, nodelist=None, verbose=False, force=False, parallel=False):
+        """
+        Stop the cluster manager on every node in the cluster, or on every node in nodelist.
+
+        If parallel is True, stop the cluster manager on all nodes at the same
+        time instead of one node after another, and then wait for the cluster
+        to stabilize once rather than after each node.
+        """
         ret = True
 
         if not nodelist:
             nodelist = self.env["nodes"]
 
-        for node in self.env["nodes"]:
-            if self.expected_status[node] == "up" or force:
-                if not self.stop_cm(node, verbose=verbose, force=force):
-                    ret = False
+        nodes = [node for node in self.env["nodes"]
+                 if self.expected_status[node] == "up" or force]
+
+        if parallel:
+            def stop(node):
+                return self.stop_cm(node, verbose=verbose, force=force, wait_stable=False)
+
+            results = self.fanout(nodes, stop)
+            if nodes:
+                self.cluster_stable(self.env["DeadTime"])
+
+            return all(results)
+
+        for node in nodes:
+            if not self.stop_cm(node, verbose=verbose, force=force):
+                ret = False
 
         return ret
 
@@ -526,30 +611,34 @@ class ClusterManager(UserDict):
             self.log("Node %s is not up." % node)
             return
 
-        if node in self._cib_sync or not self.env["ClobberCIB"]:
-            return
+        # With parallel startup, this can be called for several nodes at once.
+        # Hold the lock until the CIB is installed so only one node gets it,
+        # and the others don't go on before it's there.
+        with self._cib_lock:
+            if node in self._cib_sync or not self.env["ClobberCIB"]:
+                return
 
-        self._cib_sync[node] = True
-        self.rsh(node, "rm -f %s/cib*" % BuildOptions.CIB_DIR)
+            self._cib_sync[node] = True
+            self.rsh(node, "rm -f %s/cib*" % BuildOptions.CIB_DIR)
 
-        # Only install the CIB on the first node, all the other ones will pick it up from there
-        if self._cib_installed:
-            return
+            # Only install the CIB on the first node, all the other ones will pick it up from there
+            if self._cib_installed:
+                return
 
-        self._cib_installed = True
-        if self.env["CIBfilename"] is None:
-            self.log("Installing Generated CIB on node %s" % node)
-            self._cib.install(node)
+            self._cib_installed = True
+            if self.env["CIBfilename"] is None:
+                self.log("Installing Generated CIB on node %s" % node)
+                self._cib.install(node)
 
-        else:
-            self.log("Installing CIB (%s) on node %s" % (self.env["CIBfilename"], node))
+            else:
+                self.log("Installing CIB (%s) on node %s" % (self.env["CIBfilename"], node))
 
-            rc = self.rsh.copy(self.env["CIBfilename"], "root@" + (self.templates["CIBfile"] % node))
+                rc = self.rsh.copy(self.env["CIBfilename"], "root@" + (self.templates["CIBfile"] % node))
 
-            if rc != 0:
-                raise ValueError("Can not scp file to %s %d" % (node, rc))
+                if rc != 0:
+                    raise ValueError("Can not scp file to %s %d" % (node, rc))
 
-        self.rsh(node, "chown %s %s/cib.xml" % (BuildOptions.DAEMON_USER, BuildOptions.CIB_DIR))
+            self.rsh(node, "chown %s %s/cib.xml" % (BuildOptions.DAEMON_USER, BuildOptions.CIB_DIR))
 
     def prepare(self):
         """
@@ -12,14 +12,126 @@ __copyright__ = "Copyright 2000-2024 the Pacemaker project contributors"
 __license__ = "GNU General Public License version 2 or later (GPLv2+) WITHOUT ANY WARRANTY"
 
 import re
-import time
+
+from collections import Counter, OrderedDict
+from itertools import chain
 
 from pacemaker._cts.audits import ClusterAudit
 from pacemaker._cts.input import should_continue
 from pacemaker._cts.tests.ctstest import CTSTest
+from pacemaker._cts.timer import monotonic_ns
 from pacemaker._cts.watcher import LogWatcher
 
 
+def _required_literal(pattern, min_len=4):
+    """
+    Return a piece of literal text that anything matching a regex must contain.
+
+    This is only meant to be good enough for prefiltering lines before running
+    the regex, so it errs on the side of returning None.  It ignores anything
+    inside groups and character classes, and gives up on patterns with
+    alternation or inline flags outside of a group.
+
+    Returns the longest such piece of text, or None if there is not one at
+    least min_len characters long.
+    """
+    best = ""
+    run = ""
+    depth = 0
+    i = 0
+    n = len(pattern)
+
+    while i < n:
+        c = pattern[i]
+        i += 1
+        lit = None
+
+        if c == "\\":
+            # Escaped punctuation is literal, but \d, \w, \x41, \1, etc. are
+            # not.  Skip over the whole escape so none of it is taken as
+            # literal text.
+            esc = pattern[i] if i < n else ""
+            i += 1
+
+            if esc and not esc.isalnum():
+                lit = esc
+            elif esc == "x":
+                i += 2
+            elif esc == "u":
+                i += 4
+            elif esc == "U":
+                i += 8
+            elif esc == "N":
+                end = pattern.find("}", i)
+                i = n if end == -1 else end + 1
+            elif esc.isdigit():
+                # Octal escapes and backreferences are at most three digits
+                for _ in range(2):
+                    if i < n and pattern[i].isdigit():
+                        i += 1
+
+        elif c == "[":
+            # Skip over the whole character class
+            if i < n and pattern[i] == "^":
+                i += 1
+
+            if i < n and pattern[i] == "]":
+                i += 1
+
+            while i < n and pattern[i] != "]":
+                if pattern[i] == "\\":
+                    i += 1
+
+                i += 1
+
+            i += 1
+
+        elif c == "{":
+            # Skip over a {m,n} quantifier
+            end = pattern.find("}", i)
+            if end != -1:
+                i = end + 1
+
+        elif c == "(":
+            # Inline flags like (?i) or (?x) change what the rest of the
+            # pattern matches
+            flag = pattern[i + 1:i + 2]
+            if depth == 0 and pattern[i:i + 1] == "?" and flag and flag in "aiLmsux-":
+                return None
+
+            depth += 1
+
+        elif c == ")":
+            depth -= 1
+
+        elif c == "|" and depth == 0:
+            return None
+
+        elif c not in ".^$*+?}":
+            lit = c
+
+        nxt = pattern[i] if i < n else ""
+
+        if lit is None or depth > 0 or nxt in ("*", "?", "{"):
+            # This character may be missing, repeated, or not literal at all
+            run = ""
+            continue
+
+        run += lit
+        if len(run) > len(best):
+            best = run
+
+        if nxt == "+":
+            # The character is there at least once, but nothing after it
+            # necessarily follows it directly
+            run = ""
+
+    if len(best) < min_len:
+        return None
+
+    return best
+
+
 class ScenarioComponent:
     """
     The base class for all scenario components.
@@ -28,6 +140,8 @@ class ScenarioComponent:
     basically just a setup and teardown method.
     """
 
+    __slots__ = ("_cm", "_env")
+
     def __init__(self, cm, env):
         """
         Create a new ScenarioComponent instance.
@@ -74,6 +188,13 @@ class Scenario:
     tests and audits, and then tearing down its components in reverse.
     """
 
+    __slots__ = ("stats", "tests", "_audits", "_bad_news", "_batchbuf",
+                 "_cm", "_components", "_ignore_cache", "_ignore_epoch",
+                 "_ignorebuf", "_last_group_key", "_log_config_detected")
+
+    # The per-test stats keys reported by summarize()
+    _STAT_KEYS = ("calls", "failure", "skipped", "auditfail")
+
     def __init__(self, cm, components, audits, tests):
         """
         Create a new Scenario instance.
@@ -87,51 +208,51 @@ class Scenario:
         """
         # pylint: disable=invalid-name
 
-        self.stats = {
+        self.stats = Counter({
             "success": 0,
             "failure": 0,
             "BadNews": 0,
             "skipped": 0
-        }
+        })
         self.tests = tests
 
         self._audits = audits
         self._bad_news = None
+        self._batchbuf = []
         self._cm = cm
         self._components = components
-
-        for comp in components:
-            if not issubclass(comp.__class__, ScenarioComponent):
-                raise ValueError("Init value must be subclass of ScenarioComponent")
-
-        for audit in audits:
-            if not issubclass(audit.__class__, ClusterAudit):
-                raise ValueError("Init value must be subclass of ClusterAudit")
-
-        for test in tests:
-            if not issubclass(test.__class__, CTSTest):
-                raise ValueError("Init value must be a subclass of CTSTest")
+        self._ignore_cache = (None, None, None)
+        self._ignore_epoch = -1
+        self._ignorebuf = []
+        self._last_group_key = None
+        self._log_config_detected = False
+
+        for (objs, base) in [(components, ScenarioComponent),
+                             (audits, ClusterAudit),
+                             (tests, CTSTest)]:
+            if not all(isinstance(obj, base) for obj in objs):
+                raise ValueError("Init value must be a subclass of %s" % base.__name__)
 
     def is_applicable(self):
         """Return True if all ScenarioComponents are applicable."""
-        for comp in self._components:
-            if not comp.is_applicable():
-                return False
-
-        return True
+        return all(comp.is_applicable() for comp in self._components)
 
     def setup(self):
         """
         Set up the scenario, returning True on success.
 
         If setup fails at some point, tear down those components that did
-        successfully set up.
+        successfully set up, as well as the one that failed, since it may
+        have been partially set up.
         """
         self._cm.prepare()
         self.audit()  # Also detects remote/local log config
         self._cm.ns.wait_for_all_nodes(self._cm.env["nodes"])
 
-        self.audit()
+        # Only audit again if the first pass couldn't figure out logging
+        if not self._log_config_detected:
+            self.audit()
+
         self._cm.install_support()
 
         self._bad_news = LogWatcher(self._cm.env["LogFileName"],
@@ -141,17 +262,14 @@ class Scenario:
                                     "BadNews", 0)
         self._bad_news.set_watch()  # Call after we've figured out what type of log watching to do in LogAudit
 
-        j = 0
-        while j < len(self._components):
-            if not self._components[j].setup():
+        for (j, comp) in enumerate(self._components):
+            if not comp.setup():
                 # OOPS!  We failed.  Tear partial setups down.
                 self.audit()
                 self._cm.log("Tearing down partial setup")
                 self.teardown(j)
                 return False
 
-            j += 1
-
         self.audit()
         return True
 
@@ -159,25 +277,22 @@ class Scenario:
         """
         Tear down the scenario in the reverse order it was set up.
 
-        If n_components is not None, only tear down that many components.
+        If n_components is not None, only tear down the components up to and
+        including that index.  A value of -1 tears down no components.
         """
-        if not n_components:
-            n_components = len(self._components) - 1
-
-        j = n_components
+        if n_components is None:
+            n = len(self._components)
+        else:
+            n = n_components + 1
 
-        while j >= 0:
-            self._components[j].teardown()
-            j -= 1
+        for comp in reversed(self._components[:n]):
+            comp.teardown()
 
         self.audit()
         self._cm.install_support("uninstall")
 
     def incr(self, name):
         """Increment the given stats key."""
-        if name not in self.stats:
-            self.stats[name] = 0
-
         self.stats[name] += 1
 
     def run(self, iterations):
@@ -202,87 +317,90 @@ class Scenario:
         testcount is the number of tests (including this one) that have been
         run across all iterations.
         """
-        nodechoice = self._cm.env.random_node()
+        cm = self._cm
+        env = cm.env
+        log = cm.log
+
+        nodechoice = env.random_node()
 
         ret = True
         did_run = False
 
-        self._cm.clear_instance_errors_to_ignore()
+        cm.clear_instance_errors_to_ignore()
         choice = "(%s)" % nodechoice
-        self._cm.log("Running test {:<22} {:<15} [{:>3}]".format(test.name, choice, testcount))
+        log("Running test %-22s %-15s [%3d]" % (test.name, choice, testcount))
 
-        starttime = test.set_timer()
+        starttime_ns = test.set_timer_ns()
 
-        if not test.setup(nodechoice):
-            self._cm.log("Setup failed")
+        if not test.setup(nodechoice, prev_key=self._last_group_key):
+            log("Setup failed")
             ret = False
         else:
             did_run = True
             ret = test(nodechoice)
 
         if not test.teardown(nodechoice):
-            self._cm.log("Teardown failed")
+            log("Teardown failed")
 
-            if not should_continue(self._cm.env):
+            if not should_continue(env):
                 raise ValueError("Teardown of %s on %s failed" % (test.name, nodechoice))
 
             ret = False
 
-        stoptime = time.time()
-        self._cm.oprofile_save(testcount)
+        stoptime_ns = monotonic_ns()
+        cm.oprofile_save(testcount)
 
-        elapsed_time = stoptime - starttime
-        test_time = stoptime - test.get_timer()
+        elapsed_ns = stoptime_ns - starttime_ns
+        test_ns = stoptime_ns - test.get_timer_ns()
 
-        if "min_time" not in test.stats:
-            test.stats["elapsed_time"] = elapsed_time
-            test.stats["min_time"] = test_time
-            test.stats["max_time"] = test_time
+        stats = test.stats
+        min_ns = stats.get("min_time_ns")
+
+        if min_ns is None:
+            stats["elapsed_time_ns"] = elapsed_ns
+            stats["min_time_ns"] = test_ns
+            stats["max_time_ns"] = test_ns
         else:
-            test.stats["elapsed_time"] += elapsed_time
+            stats["elapsed_time_ns"] += elapsed_ns
 
-            if test_time < test.stats["min_time"]:
-                test.stats["min_time"] = test_time
+            if test_ns < min_ns:
+                stats["min_time_ns"] = test_ns
 
-            if test_time > test.stats["max_time"]:
-                test.stats["max_time"] = test_time
+            if test_ns > stats["max_time_ns"]:
+                stats["max_time_ns"] = test_ns
 
         if ret:
             self.incr("success")
             test.log_timer()
+            self._last_group_key = test.group_key()
         else:
             self.incr("failure")
-            self._cm.statall()
+            cm.statall()
             did_run = True  # Force the test count to be incremented anyway so test extraction works
 
+            # Don't let the next test assume the cluster is in a known state
+            self._last_group_key = None
+
         self.audit(test.errors_to_ignore)
         return did_run
 
     def summarize(self):
         """Output scenario results."""
         self._cm.log("****************")
-        self._cm.log("Overall Results:%r" % self.stats)
+        self._cm.log("Overall Results:%r" % dict(self.stats))
         self._cm.log("****************")
 
-        stat_filter = {
-            "calls": 0,
-            "failure": 0,
-            "skipped": 0,
-            "auditfail": 0,
-        }
-
         self._cm.log("Test Summary")
         for test in self.tests:
-            for key in stat_filter:
-                stat_filter[key] = test.stats[key]
-
+            stat_filter = {key: test.stats[key] for key in self._STAT_KEYS}
             name = "Test %s:" % test.name
-            self._cm.log("{:<25} {!r}".format(name, stat_filter))
+            self._cm.log("%-25s %r" % (name, stat_filter))
 
         self._cm.debug("Detailed Results")
         for test in self.tests:
+            stat_filter = {key: test.stats[key] for key in self._STAT_KEYS}
             name = "Test %s:" % test.name
-            self._cm.debug("{:<25} {!r}".format(name, stat_filter))
+            self._cm.debug("%-25s %r" % (name, stat_filter))
 
         self._cm.log("<<<<<<<<<<<<<<<< TESTS COMPLETED")
 
@@ -293,16 +411,6 @@ class Scenario:
         If there are too many failures, prompt the user to confirm that the
         scenario should continue running.
         """
-        errcount = 0
-
-        ignorelist = ["CTS:"]
-
-        if local_ignore:
-            ignorelist.extend(local_ignore)
-
-        ignorelist.extend(self._cm.errors_to_ignore)
-        ignorelist.extend(self._cm.instance_errors_to_ignore)
-
         # This makes sure everything is stabilized before starting...
         failed = 0
         for audit in self._audits:
@@ -312,24 +420,65 @@ class Scenario:
             else:
                 self._cm.debug("Audit %s passed." % audit.name)
 
-        while errcount < 1000:
-            match = None
-            if self._bad_news:
-                match = self._bad_news.look(0)
+        # LogAudit records which kind of log it found its test message in
+        if self._cm.env["log_kind"] is not None:
+            self._log_config_detected = True
 
-            if match:
-                add_err = True
+        # Nothing more to do until setup() starts watching for BadNews
+        if self._bad_news is None:
+            return failed
 
-                for ignore in ignorelist:
-                    if add_err and re.search(ignore, match):
-                        add_err = False
+        errcount = 0
 
-                if add_err:
-                    self._cm.log("BadNews: %s" % match)
-                    self.incr("BadNews")
-                    errcount += 1
-            else:
+        # The cluster manager's ignore patterns only change when its epoch
+        # does, so only rebuild our copy of them then.
+        epoch = self._cm.instance_errors_to_ignore_epoch
+        if epoch != self._ignore_epoch:
+            self._ignorebuf.clear()
+            self._ignorebuf.append("CTS:")
+            self._ignorebuf.extend(self._cm.errors_to_ignore)
+            self._ignorebuf.extend(self._cm.instance_errors_to_ignore)
+            self._ignore_epoch = epoch
+
+        # Combine all the ignore patterns into a single regex so each BadNews
+        # line only needs one search.  Only recompile when the list changes.
+        #
+        # Also work out some literal text each pattern requires.  A line that
+        # contains none of it can't match, and checking for that is much
+        # cheaper than running the regex.  If any pattern has no such text,
+        # every line has to go through the regex.
+        key = (epoch, tuple(local_ignore or ()))
+        if key != self._ignore_cache[0]:
+            ignorelist = list(chain(self._ignorebuf, key[1]))
+
+            literals = tuple(_required_literal(p) for p in ignorelist)
+            if None in literals:
+                literals = None
+
+            self._ignore_cache = (key,
+                                  re.compile("|".join("(?:%s)" % p for p in ignorelist), re.ASCII),
+                                  literals)
+
+        (_, ignore_re, literals) = self._ignore_cache
+
+        batch = self._batchbuf
+
+        while errcount < 1000:
+            batch.clear()
+            if not self._bad_news.drain_into(batch, max_lines=128):
                 break
+
+            for match in batch:
+                if literals is None or any(lit in match for lit in literals):
+                    if ignore_re.search(match):
+                        continue
+
+                self._cm.log("BadNews: %s" % match)
+                self.incr("BadNews")
+                errcount += 1
+
+                if errcount >= 1000:
+                    break
         else:
             print("Big problems")
             if not should_continue(self._cm.env):
@@ -338,50 +487,72 @@ class Scenario:
                 self.teardown()
                 raise ValueError("Looks like we hit a BadNews jackpot!")
 
-        if self._bad_news:
-            self._bad_news.end()
-
+        batch.clear()
+        self._bad_news.end()
         return failed
 
 
 class AllOnce(Scenario):
     """Every Test Once."""
 
+    __slots__ = ()
+
     def _run_loop(self, iterations):
+        run_test = self.run_test
         testcount = 1
 
         for test in self.tests:
-            self.run_test(test, testcount)
+            run_test(test, testcount)
             testcount += 1
 
 
 class RandomTests(Scenario):
     """Random Test Execution."""
 
+    __slots__ = ()
+
     def _run_loop(self, iterations):
+        choice = self._cm.env.random_gen.choice
+        run_test = self.run_test
+        tests = self.tests
+
+        # Draw all the tests up front and then group together the ones that
+        # need the same cluster state, so they can skip re-establishing it.
+        # Groups are ordered by first appearance, and tests keep their random
+        # order within a group.
+        groups = OrderedDict()
+        for _ in range(iterations):
+            test = choice(tests)
+            groups.setdefault(test.group_key(), []).append(test)
+
         testcount = 1
 
-        while testcount <= iterations:
-            test = self._cm.env.random_gen.choice(self.tests)
-            self.run_test(test, testcount)
-            testcount += 1
+        for group in groups.values():
+            for test in group:
+                run_test(test, testcount)
+                testcount += 1
 
 
 class Sequence(Scenario):
     """Named Tests in Sequence."""
 
+    __slots__ = ()
+
     def _run_loop(self, iterations):
+        run_test = self.run_test
         testcount = 1
 
         while testcount <= iterations:
             for test in self.tests:
-                self.run_test(test, testcount)
+                run_test(test, testcount)
                 testcount += 1
 
 
 class Boot(Scenario):
     """Start the Cluster."""
 
+    __slots__ = ()
+
     def _run_loop(self, iterations):
         return
 
@@ -395,6 +566,8 @@ class BootCluster(ScenarioComponent):
     beforehand.
     """
 
+    __slots__ = ()
+
     def is_applicable(self):
         """Return whether this scenario is applicable."""
         return True
@@ -404,21 +577,23 @@ class BootCluster(ScenarioComponent):
         self._cm.prepare()
 
         #        Clear out the cobwebs ;-)
-        self._cm.stopall(verbose=True, force=True)
+        self._cm.stopall(verbose=True, force=True, parallel=True)
 
         # Now start the Cluster Manager on all the nodes.
         self._cm.log("Starting Cluster Manager on all nodes.")
-        return self._cm.startall(verbose=True, quick=True)
+        return self._cm.startall(verbose=True, quick=True, parallel=True)
 
     def teardown(self):
         """Tear down the component."""
         self._cm.log("Stopping Cluster Manager on all nodes")
-        self._cm.stopall(verbose=True, force=False)
+        self._cm.stopall(verbose=True, force=False, parallel=True)
 
 
 class LeaveBooted(BootCluster):
     """Leave all nodes up when the scenario is complete."""
 
+    __slots__ = ()
+
     def teardown(self):
         """Tear down the component."""
         self._cm.log("Leaving Cluster running on all nodes")
@@ -88,6 +88,18 @@ class CTSTest:
         self._timers[key].start()
         return self._timers[key].start_time
 
+    def get_timer_ns(self, key="test"):
+        """Get the start time of the given timer on the monotonic clock, in nanoseconds."""
+        try:
+            return self._timers[key].start_time_ns
+        except KeyError:
+            return 0
+
+    def set_timer_ns(self, key="test"):
+        """Like set_timer(), but return the start time in monotonic nanoseconds."""
+        self.set_timer(key)
+        return self._timers[key].start_time_ns
+
     def log_timer(self, key="test"):
         """Log the elapsed time of the given timer."""
         if key not in self._timers:
@@ -142,9 +154,27 @@ class CTSTest:
 
         return passed
 
-    def setup(self, node):
-        """Set up this test."""
-        # node is used in subclasses
+    def group_key(self):
+        """
+        Return a hashable value describing the cluster state this test needs.
+
+        Tests with equal keys can run back to back without re-establishing
+        cluster state in between.  The default of None means this test has no
+        particular requirements.
+        """
+        return None
+
+    def setup(self, node, prev_key=None):
+        """
+        Set up this test.
+
+        Arguments:
+        node     -- The node the test will run on
+        prev_key -- The group_key() of the test that ran just before this
+                    one, or None.  If it is equal to this test's own key,
+                    setup may skip restoring cluster state.
+        """
+        # node and prev_key are used in subclasses
         # pylint: disable=unused-argument
 
         return self.success()
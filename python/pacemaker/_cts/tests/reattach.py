@@ -96,7 +96,7 @@ class Reattach(CTSTest):
         """
         return self._rsh(node, """crm_resource --refresh""")
 
-    def setup(self, node):
+    def setup(self, node, prev_key=None):
         """Set up this test."""
         if not self._startall(None):
             return self.failure("Startall failed")
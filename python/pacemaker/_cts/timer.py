@@ -1,11 +1,19 @@
 """Timer-related utilities for CTS."""
 
-__all__ = ["Timer"]
+__all__ = ["Timer", "monotonic_ns"]
 __copyright__ = "Copyright 2000-2024 the Pacemaker project contributors"
 __license__ = "GNU General Public License version 2 or later (GPLv2+) WITHOUT ANY WARRANTY"
 
 import time
 
+try:
+    from time import monotonic_ns
+except ImportError:
+    # monotonic_ns() was added in python 3.7
+    def monotonic_ns():
+        """Return the value of the monotonic clock, in integer nanoseconds."""
+        return int(time.monotonic() * 1000000000)
+
 
 class Timer:
     """
@@ -31,6 +39,7 @@ class Timer:
         timer_name  -- The name of this timer
         """
         self._logger = logger
+        self._start_ns = None
         self._start_time = None
         self._test_name = test_name
         self._timer_name = timer_name
@@ -50,6 +59,7 @@ class Timer:
 
     def start(self):
         """Start the timer."""
+        self._start_ns = monotonic_ns()
         self._start_time = time.time()
 
     @property
@@ -57,7 +67,12 @@ class Timer:
         """Return when the timer started."""
         return self._start_time
 
+    @property
+    def start_time_ns(self):
+        """Return when the timer started, in nanoseconds on the monotonic clock."""
+        return self._start_ns
+
     @property
     def elapsed(self):
         """Return how long the timer has been running for."""
-        return time.time() - self._start_time
+        return (monotonic_ns() - self._start_ns) / 1e9
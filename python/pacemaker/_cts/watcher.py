@@ -485,6 +485,25 @@ class LogWatcher:
         for f in self._file_list:
             f.end()
 
+    def _match_line(self, line):
+        """
+        Check whether a single log line matches any regex in this object.
+
+        If it does, record which regex matched in self.whichmatch.
+
+        Returns True if the line matched, or False otherwise.
+        """
+        if re.search("CTS:", line):
+            return False
+
+        for (which, regex) in enumerate(self.regexes):
+            if re.search(regex, line):
+                self.whichmatch = which
+                self._debug("Matched: %s" % line)
+                return True
+
+        return False
+
     def look(self, timeout=None):
         """
         Examine the log looking for the regexes in this object.
@@ -522,20 +541,8 @@ class LogWatcher:
                     line = self._line_cache[0]
                     self._line_cache.remove(line)
 
-                which = -1
-
-                if re.search("CTS:", line):
-                    continue
-
-                for regex in self.regexes:
-                    which += 1
-
-                    matchobj = re.search(regex, line)
-
-                    if matchobj:
-                        self.whichmatch = which
-                        self._debug("Matched: %s" % line)
-                        return line
+                if self._match_line(line):
+                    return line
 
             elif timeout > 0 and end < time.time():
                 timeout = 0
@@ -552,6 +559,85 @@ class LogWatcher:
                 self._debug("Waiting: start=%d, end=%d, now=%d, lines=%d" % (begin, end, time.time(), len(self._line_cache)))
                 time.sleep(1)
 
+    def _take_matches(self, result, max_lines):
+        """
+        Move matching lines from the line cache to the end of result.
+
+        Stop once result holds max_lines lines, leaving any lines that were
+        not examined in the cache.
+
+        Returns the number of lines examined.
+        """
+        with self._cache_lock:
+            batch = self._line_cache
+            self._line_cache = []
+
+        for (idx, line) in enumerate(batch):
+            if self._match_line(line):
+                result.append(line)
+
+                if len(result) >= max_lines:
+                    # Put back whatever we didn't get to
+                    with self._cache_lock:
+                        self._line_cache[0:0] = batch[idx + 1:]
+
+                    return idx + 1
+
+        return len(batch)
+
+    def drain_into(self, result, max_lines=128, idle=0.05):
+        """
+        Append matching lines that are already in the log to result.
+
+        This is like calling look(0) repeatedly, except that it does not poll
+        the log on a fixed one second interval.  Instead, it keeps reading
+        until a read comes back with nothing new, waits idle seconds for any
+        stragglers, and stops once a read after that is empty too.  As with
+        look(0), only lines logged before the first call (up to the next
+        end()) are considered.
+
+        Taking the list from the caller lets callers that drain repeatedly
+        reuse one list.
+
+        Arguments:
+        result    -- The list to append matching lines to
+        max_lines -- Stop once result holds this many lines
+        idle      -- Number of seconds to wait after an empty read before
+                     deciding the log has been drained
+
+        Returns the number of lines appended to result
+        """
+        start = len(result)
+        lines = 0
+        waited = False
+
+        if not self.regexes:
+            self._debug("Nothing to look for")
+            return 0
+
+        for f in self._file_list:
+            f.set_end()
+
+        while len(result) < max_lines:
+            if self._line_cache:
+                lines += self._take_matches(result, max_lines)
+                waited = False
+                continue
+
+            self.__get_lines()
+
+            if self._line_cache:
+                continue
+
+            if waited:
+                self._debug("Drained %d lines" % lines)
+                break
+
+            waited = True
+            time.sleep(idle)
+
+        return len(result) - start
+
     def look_for_all(self, allow_multiple_matches=False, silent=False):
         """
         Like look(), but looks for matches for multiple regexes.
@@ -0,0 +1,126 @@
+# These warnings are not useful in unit tests.
+# pylint: disable=missing-class-docstring,missing-function-docstring,missing-module-docstring
+
+__copyright__ = "Copyright 2024 the Pacemaker project contributors"
+__license__ = "GPLv2+"
+
+import re
+import unittest
+
+from pacemaker._cts.scenarios import AllOnce, ScenarioComponent, _required_literal
+
+
+class RequiredLiteralTestCase(unittest.TestCase):
+    def test_plain(self):
+        self.assertEqual(_required_literal("CTS:"), "CTS:")
+        self.assertEqual(_required_literal("avoid confusing Valgrind"),
+                         "avoid confusing Valgrind")
+
+    def test_longest_run(self):
+        self.assertEqual(_required_literal(r"pacemaker-schedulerd.* Calculated transition .*/pe-error"),
+                         " Calculated transition ")
+        self.assertEqual(_required_literal(r"%s\W.*controller successfully started"),
+                         "controller successfully started")
+
+    def test_escapes(self):
+        self.assertEqual(_required_literal(r"\d\d\dabcd\.x"), "abcd.x")
+        self.assertEqual(_required_literal(r"a\*bcd"), "a*bcd")
+
+    def test_quantifiers(self):
+        # The quantified character itself may be missing
+        self.assertEqual(_required_literal("xabcd?e"), "xabc")
+        self.assertEqual(_required_literal("xabcd*e"), "xabc")
+        self.assertEqual(_required_literal("xabcd{0,2}e"), "xabc")
+
+        # It must be there with +, but may be followed by more copies of itself
+        self.assertEqual(_required_literal("abcd+efg"), "abcd")
+
+        # Digits in a {m,n} quantifier are not literal text
+        self.assertIsNone(_required_literal("ab.{1234}cd"))
+
+    def test_groups_and_classes(self):
+        self.assertIsNone(_required_literal("(foobar)?"))
+        self.assertIsNone(_required_literal("[abcdef]xy"))
+        self.assertEqual(_required_literal("[|]abcd"), "abcd")
+        self.assertEqual(_required_literal("x(a|b)yzzy"), "yzzy")
+
+    def test_alternation(self):
+        self.assertIsNone(_required_literal("abcdefgh|ijklmnop"))
+
+    def test_too_short(self):
+        self.assertIsNone(_required_literal("abc"))
+        self.assertEqual(_required_literal("abc", min_len=3), "abc")
+
+    def test_matches_contain_literal(self):
+        # Whatever a pattern matches has to contain its literal text
+        for (pattern, line) in [(r"libvirtd.*: internal error: Failed to parse PCI config address",
+                                 "libvirtd[123]: internal error: Failed to parse PCI config address"),
+                                (r"pacemaker-fenced.*: (Couldn't|Could not) find",
+                                 "pacemaker-fenced[1]: Could not find"),
+                                (r"pcs.daemon:No response from: .* request: get_configs, error:",
+                                 "pcs.daemon:No response from: node1 request: get_configs, error: x"),
+                                (r"\x41bcdefg", "Abcdefg"),
+                                (r"\u0041bcdefg", "Abcdefg"),
+                                (r"\U00000041bcdefg", "Abcdefg"),
+                                (r"\N{LATIN CAPITAL LETTER A}bcdefg", "Abcdefg"),
+                                (r"\101bcdefg", "Abcdefg"),
+                                (r"\0bcdefg", "\0bcdefg"),
+                                (r"(abcd)\1wxyz", "abcdabcdwxyz"),
+                                (r"(?i)connection lost", "CONNECTION LOST"),
+                                (r"(?x)connection \ lost", "connection lost"),
+                                (r"(?-i:x)connection lost", "xconnection lost")]:
+            self.assertIsNotNone(re.search(pattern, line), pattern)
+
+            literal = _required_literal(pattern)
+            if literal is not None:
+                self.assertIn(literal, line, pattern)
+
+
+class FakeClusterManager:
+    def __init__(self):
+        self.env = {"log_kind": None}
+
+    def install_support(self, command="install"):
+        pass
+
+
+class FakeComponent(ScenarioComponent):
+    __slots__ = ("name", "torn_down")
+
+    def __init__(self, cm, name, torn_down):
+        ScenarioComponent.__init__(self, cm, cm.env)
+        self.name = name
+        self.torn_down = torn_down
+
+    def is_applicable(self):
+        return True
+
+    def setup(self):
+        return True
+
+    def teardown(self):
+        self.torn_down.append(self.name)
+
+
+class ScenarioTeardownTestCase(unittest.TestCase):
+    def teardown_order(self, *args):
+        cm = FakeClusterManager()
+        torn_down = []
+        scenario = AllOnce(cm, [FakeComponent(cm, name, torn_down)
+                                for name in ["first", "second", "third"]],
+                           [], [])
+
+        scenario.teardown(*args)
+        return torn_down
+
+    def test_all(self):
+        self.assertEqual(self.teardown_order(), ["third", "second", "first"])
+
+    def test_up_to_index(self):
+        self.assertEqual(self.teardown_order(1), ["second", "first"])
+
+    def test_first_only(self):
+        self.assertEqual(self.teardown_order(0), ["first"])
+
+    def test_none(self):
+        self.assertEqual(self.teardown_order(-1), [])